@@ -1,10 +1,120 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
 import io
+import json
+import os
+import sys
+import logging
+import importlib.util
+import fnmatch
+import time
+import re
+import uuid
+import threading
+import gzip
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+
+
+# ============================================================================
+# STARTUP: DEFERRED IMPORTS, PREWARM & READINESS
+# ============================================================================
+# Command-line entry points (ignored under `streamlit run`):
+#   python app.py --serve [streamlit options]  run the page once headless to warm
+#                                               the caches, then start the server
+#                                               in the same process
+#   python app.py --check-ready                exit 0 once a --serve process is warm
+#                                               and its server answers health checks
+WARM_STATUS_PATH = Path(__file__).parent / '.warm_status.json'
+
+
+def lazy_import(name):
+    # Module whose code only runs on first attribute access, so plotting libraries
+    # load when the first chart is built rather than before the page starts
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    parent, _, child = name.rpartition('.')
+    if parent:
+        setattr(sys.modules[parent], child, module)  # What a regular import would bind
+    return module
+
+
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
+plotly_subplots = lazy_import('plotly.subplots')
+
+
+def check_readiness():
+    # Warm caches are not enough: the server must also be accepting requests,
+    # which the status file cannot know, so ask its health endpoint
+    try:
+        status = json.loads(WARM_STATUS_PATH.read_text())
+        os.kill(status['pid'], 0)  # Raises if the serving process is gone
+        with urllib.request.urlopen(status['health_url'], timeout=2) as response:
+            ready = response.status == 200
+    except (OSError, ValueError, KeyError):  # URLError is an OSError
+        ready = False
+    if not ready:
+        print(json.dumps({'ready': False}))
+        return 1
+    print(json.dumps({'ready': True, **status}))
+    return 0
+
+
+def _server_option(args, name):
+    # Value of a --server.<name> flag passed on to `streamlit run`, else Streamlit's config
+    flag = f'--server.{name}'
+    for i, arg in enumerate(args):
+        if arg == flag and i + 1 < len(args):
+            return args[i + 1]
+        if arg.startswith(flag + '='):
+            return arg.split('=', 1)[1]
+    return st.get_option(f'server.{name}')
+
+
+def health_url(args):
+    address = _server_option(args, 'address')
+    host = address if address and address not in ('0.0.0.0', '::') else 'localhost'
+    path = '/'.join(p for p in [str(_server_option(args, 'baseUrlPath') or '').strip('/'), '_stcore/health'] if p)
+    return f"http://{host}:{_server_option(args, 'port')}/{path}"
+
+
+def serve(warm_start):
+    server_args = [a for a in sys.argv[1:] if a != '--serve']
+    status = {
+        'pid': os.getpid(),
+        'health_url': health_url(server_args),
+        'warmed_at': datetime.now().isoformat(timespec='seconds'),
+        'warmup_seconds': round(time.perf_counter() - warm_start, 2),
+    }
+    WARM_STATUS_PATH.write_text(json.dumps(status))
+    logging.disable(logging.NOTSET)
+    
+    # Start the server in this process so sessions reuse the warmed caches and modules
+    from streamlit.web import cli as stcli
+    sys.argv = ['streamlit', 'run', os.path.abspath(__file__), *server_args]
+    try:
+        return stcli.main()
+    finally:
+        WARM_STATUS_PATH.unlink(missing_ok=True)
+
+
+SERVE = not st.runtime.exists() and '--serve' in sys.argv
+if not st.runtime.exists() and '--check-ready' in sys.argv:
+    sys.exit(check_readiness())
+if SERVE:
+    warm_start = time.perf_counter()
+    WARM_STATUS_PATH.unlink(missing_ok=True)
+    logging.disable(logging.WARNING)  # Headless warm-up run: skip "missing ScriptRunContext" noise
 
 # ============================================================================
 # PAGE CONFIGURATION
@@ -50,6 +160,71 @@ st.markdown("""
 # ============================================================================
 # DATA LOADING
 # ============================================================================
+# FunctionName convention: <service>-<environment suffix>
+ENVIRONMENT_SUFFIX_PATTERN = r'-(prod|staging|dev)$'
+
+# AWS Lambda / Fargate prices (tiers, architectures, PC, free tier) live in a local catalog
+PRICING_CATALOG_PATH = Path(__file__).parent / 'pricing_catalog.json'
+SECONDS_PER_MONTH = 730 * 3600  # Provisioned concurrency is billed for the whole month
+
+# Columns with range indexes, exposed as sidebar filters
+RANGE_INDEX_COLUMNS = {
+    'CostUSD': 'Monthly cost (USD)',
+    'MemoryMB': 'Memory (MB)',
+    'AvgDurationMs': 'Avg duration (ms)',
+}
+
+# Monthly snapshot store: snapshots/month=YYYY-MM/part-0.parquet
+SNAPSHOT_DIR = Path(__file__).parent / 'snapshots'
+SNAPSHOT_DTYPES = {
+    'FunctionName': 'string',
+    'Environment': 'category',
+    'CostUSD': 'float64',
+    'MemoryMB': 'int32',
+    'ProvisionedConcurrency': 'int32',
+    'InvocationsPerMonth': 'int64',
+}
+DIFF_METRICS = ['CostUSD', 'MemoryMB', 'ProvisionedConcurrency', 'InvocationsPerMonth']
+REGRESSION_MIN_DELTA_USD = 1.0  # Cost increases smaller than this are noise
+REGRESSION_MIN_DELTA_PCT = 10.0
+
+# Anomaly detection: robust z-scores within environment peer groups
+ANOMALY_METRICS = {
+    'CostPerInvocation': 'Cost per Invocation',
+    'CostPerGBSecond': 'Cost per GB-Second',
+    'ColdStartRate': 'Cold Start Rate',
+    'TransferPerInvocation': 'Transfer per Invocation',
+}
+ANOMALY_LOG_METRICS = ['CostPerInvocation', 'CostPerGBSecond', 'TransferPerInvocation']  # Heavy-tailed ratios
+ANOMALY_Z_THRESHOLD = 3.5  # Iglewicz & Hoaglin cutoff for modified z-scores
+ANOMALY_MIN_PEER_GROUP = 5
+
+# Background analyses (anomaly scoring, snapshot diffs, forecast scenarios) run on a
+# shared thread pool; pages poll for them instead of waiting
+BACKGROUND_WORKERS = 2
+ANALYSIS_POLL_SECONDS = 0.5
+
+# Recommendation exports: written chunk by chunk so memory stays flat on large fleets
+EXPORT_DIR = Path(__file__).parent / 'exports'
+EXPORT_CHUNK_ROWS = 100_000
+EXPORT_FORMATS = {'Parquet': '.parquet', 'CSV (gzip)': '.csv.gz', 'NDJSON': '.ndjson'}
+PC_ACTION_REASONS = {
+    'REDUCE PC': "Low cold start rate, PC may be overkill",
+    'INCREASE PC': "High cold start rate, consider more PC units",
+}
+
+# Aggregation cube layout: service family x environment x cost component
+CUBE_DIMENSIONS = ('Service', 'Environment', 'Component')
+COST_COMPONENTS = ['Compute', 'Requests', 'Provisioned Concurrency', 'Data Transfer', 'Other']
+# Cubes kept in the shared cache (one per rebuilt selection, shared by all
+# sessions); a fleet-wide cube is tens of MB at a million functions
+COST_CUBE_CACHE_ENTRIES = 4
+# Roll-up chart: top services by cost plus an "Other services" bucket, or one
+# service drilled into; the full service x environment x component grid is never charted
+ROLLUP_TOP_SERVICES = 15
+ROLLUP_DRILL_CHOICES = 100
+ROLLUP_TABLE_ROWS = 100
+
 @st.cache_data
 def load_data():
     csv_data = """FunctionName,Environment,InvocationsPerMonth,AvgDurationMs,MemoryMB,ColdStartRate,ProvisionedConcurrency,GBSeconds,DataTransferGB,CostUSD
@@ -150,10 +325,796 @@ backup-cleaner,production,60,60000,512,0.00,0,1.84,1,5.70
 metrics-aggregator,production,2500000,70,512,0.00,2,88.00,140,125.50"""
     
     df = pd.read_csv(io.StringIO(csv_data))
+    
+    # Service family = FunctionName without its environment suffix (e.g. payments-validator-prod -> payments-validator)
+    df['Service'] = df['FunctionName'].str.replace(ENVIRONMENT_SUFFIX_PATTERN, '', regex=True)
     return df
 
 df = load_data()
 
+
+# ============================================================================
+# PRICING CATALOG & TIERED COST ENGINE
+# ============================================================================
+@st.cache_data
+def load_pricing_catalog(path=PRICING_CATALOG_PATH):
+    with open(path) as f:
+        catalog = json.load(f)
+    for arch, spec in catalog['architectures'].items():
+        limits = [t['up_to_gb_seconds'] for t in spec['compute_tiers']]
+        if limits[-1] is not None or any(l is None for l in limits[:-1]) or limits[:-1] != sorted(limits[:-1]):
+            raise ValueError(f"{path}: compute tiers for {arch} must be ascending and end with an open tier")
+    return catalog
+
+
+def _cumulative_ranges(usage):
+    # Each function's [start, end) slice of the running account total
+    ends = np.cumsum(usage)
+    return np.maximum(ends - usage, 0.0), ends
+
+
+def _free_allowance(usage, allowance):
+    # Share an account-wide allowance across functions in fleet order
+    starts, ends = _cumulative_ranges(usage)
+    return np.clip(np.minimum(ends, allowance) - starts, 0, None)
+
+
+def _tiered_cost(usage, tiers):
+    # Tiers apply to the account's cumulative usage. Each function owns the slice
+    # [start, end) of the running total; since the running totals are sorted, its
+    # cost is F(end) - F(start), where F is the piecewise-linear cumulative cost
+    # curve evaluated with one searchsorted over the tier breakpoints.
+    breakpoints = np.array([0.0] + [t['up_to_gb_seconds'] for t in tiers[:-1]], dtype=float)
+    prices = np.array([t['price_per_gb_second'] for t in tiers], dtype=float)
+    cost_at_breakpoints = np.concatenate([[0.0], np.cumsum(np.diff(breakpoints) * prices[:-1])])
+    
+    def cumulative_cost(x):
+        tier = np.searchsorted(breakpoints, x, side='right') - 1
+        return cost_at_breakpoints[tier] + (x - breakpoints[tier]) * prices[tier]
+    
+    starts, ends = _cumulative_ranges(usage)
+    return cumulative_cost(ends) - cumulative_cost(starts)
+
+
+def price_fleet(frame, catalog, invocations=None, memory_mb=None, duration_ms=None):
+    # Modeled monthly cost per function. Usage overrides let scenarios re-price the
+    # fleet; frame must be the whole account so tiers and free tier apply correctly.
+    invocations = (frame['InvocationsPerMonth'] if invocations is None else invocations).to_numpy(dtype=float)
+    memory_gb = (frame['MemoryMB'] if memory_mb is None else memory_mb).to_numpy(dtype=float) / 1024
+    duration_s = (frame['AvgDurationMs'] if duration_ms is None else duration_ms).to_numpy(dtype=float) / 1000
+    pc_units = frame['ProvisionedConcurrency'].to_numpy(dtype=float)
+    if 'Architecture' in frame:
+        architecture = frame['Architecture'].fillna(catalog['default_architecture']).to_numpy(dtype=str)
+    else:
+        architecture = np.full(len(frame), catalog['default_architecture'])
+    unknown = set(np.unique(architecture)) - set(catalog['architectures'])
+    if unknown:
+        raise ValueError(f"No pricing for architecture(s): {', '.join(sorted(unknown))}")
+    
+    gb_seconds = memory_gb * duration_s * invocations
+    # Functions with PC are assumed to serve their traffic from provisioned
+    # environments, billed at the PC duration rate instead of on-demand tiers
+    on_pc = pc_units > 0
+    on_demand = np.where(on_pc, 0.0, gb_seconds)
+    billable = on_demand - _free_allowance(on_demand, catalog['free_tier']['gb_seconds'])
+    
+    compute = np.zeros(len(frame))
+    pc_unit_cost = np.zeros(len(frame))
+    for arch, spec in catalog['architectures'].items():
+        is_arch = architecture == arch
+        pc_prices = spec['provisioned_concurrency']
+        compute[is_arch] = np.where(on_pc[is_arch],
+                                    gb_seconds[is_arch] * pc_prices['duration_price_per_gb_second'],
+                                    _tiered_cost(billable[is_arch], spec['compute_tiers']))
+        pc_unit_cost[is_arch] = memory_gb[is_arch] * SECONDS_PER_MONTH * pc_prices['price_per_gb_second']
+    
+    billable_requests = invocations - _free_allowance(invocations, catalog['free_tier']['requests'])
+    requests = billable_requests / 1e6 * catalog['requests']['price_per_million']
+    pc_cost = pc_units * pc_unit_cost
+    transfer = frame['DataTransferGB'].to_numpy(dtype=float) * catalog['data_transfer']['price_per_gb']
+    
+    # Same work on Fargate: tasks sized to Lambda's memory-to-vCPU ratio, billed only while running
+    fargate = catalog['fargate']
+    vcpu = np.maximum(memory_gb * 1024 / fargate['memory_mb_per_vcpu'], fargate['min_vcpu'])
+    running_hours = invocations * duration_s / 3600
+    fargate_compute = running_hours * (vcpu * fargate['price_per_vcpu_hour'] + memory_gb * fargate['price_per_gb_hour'])
+    
+    return pd.DataFrame({
+        'ModeledGBSeconds': gb_seconds,
+        'ComputeCostUSD': compute,
+        'RequestCostUSD': requests,
+        'PCCostUSD': pc_cost,
+        'PCUnitCostUSD': pc_unit_cost,
+        'TransferCostUSD': transfer,
+        'ModeledCostUSD': compute + requests + pc_cost + transfer,
+        'FargateComputeUSD': fargate_compute,
+    }, index=frame.index)
+
+
+pricing_catalog = load_pricing_catalog()
+df = pd.concat([df, price_fleet(df, pricing_catalog)], axis=1)
+
+
+# ============================================================================
+# FUNCTION INDEX & SIDEBAR FILTERS
+# ============================================================================
+def fleet_fingerprint(df):
+    # Identifies the indexed data, so a changed fleet never reuses an index built
+    # for other rows (build_function_index does not hash _df). Service and
+    # Environment follow from FunctionName by the naming convention.
+    names = '\0'.join(df['FunctionName'].to_numpy(dtype=object))
+    values = df[list(RANGE_INDEX_COLUMNS)].to_numpy(dtype=float)
+    return len(df), hash(names), hash(values.tobytes())
+
+
+@st.cache_resource
+def build_function_index(_df, fingerprint):
+    # Sorted name arrays act as a prefix trie: every name starting with a prefix
+    # sits in one contiguous block that two binary searches can locate.
+    names = _df['FunctionName'].to_numpy(dtype=str)
+    name_order = np.argsort(names, kind='stable')
+    reversed_names = _df['FunctionName'].str[::-1].to_numpy(dtype=str)
+    reversed_order = np.argsort(reversed_names, kind='stable')
+    
+    # Range indexes: row positions ordered by value, the sorted values to bisect,
+    # and the values in row order to test a handful of rows directly
+    ranges = {}
+    for column in RANGE_INDEX_COLUMNS:
+        values = _df[column].to_numpy()
+        order = np.argsort(values, kind='stable')
+        ranges[column] = (values[order], order, values)
+    
+    # Category indexes: row positions per label, plus per-row codes for lookups
+    categories = {}
+    for column in ['Service', 'Environment']:
+        codes, labels = pd.factorize(_df[column])
+        categories[column] = {
+            'positions': _df.groupby(column).indices,
+            'label_codes': {label: code for code, label in enumerate(labels)},
+            'codes': codes,
+        }
+    
+    return {
+        'size': len(_df),
+        'fingerprint': fingerprint,
+        'names': names,
+        'name_lengths': _df['FunctionName'].str.len().to_numpy(),
+        'sorted_names': names[name_order],
+        'name_order': name_order,
+        'sorted_reversed_names': reversed_names[reversed_order],
+        'reversed_order': reversed_order,
+        'categories': categories,
+        'ranges': ranges,
+    }
+
+
+def _prefix_positions(sorted_names, order, prefix):
+    start = np.searchsorted(sorted_names, prefix, side='left')
+    end = np.searchsorted(sorted_names, prefix + '\U0010ffff', side='left')
+    return order[start:end]
+
+
+def _position_mask(size, positions):
+    # Membership test for a set of row positions without sorting it
+    mask = np.zeros(size, dtype=bool)
+    mask[positions] = True
+    return mask
+
+
+def match_function_names(index, pattern):
+    # Supports plain prefixes ("payments"), "payments-*", "*-prod" and "cart-*-prod";
+    # any other wildcard pattern falls back to a scan with fnmatch semantics.
+    head, star, tail = pattern.partition('*')
+    if not star:
+        return _prefix_positions(index['sorted_names'], index['name_order'], pattern)
+    if any(ch in pattern for ch in '?[') or '*' in tail:
+        return np.flatnonzero([fnmatch.fnmatchcase(name, pattern) for name in index['names']])
+    
+    positions = None
+    if head:
+        positions = _prefix_positions(index['sorted_names'], index['name_order'], head)
+    if tail:
+        suffix_positions = _prefix_positions(index['sorted_reversed_names'], index['reversed_order'], tail[::-1])
+        if positions is None:
+            positions = suffix_positions
+        else:
+            if len(suffix_positions) < len(positions):
+                positions, suffix_positions = suffix_positions, positions
+            positions = positions[_position_mask(index['size'], suffix_positions)[positions]]
+    if positions is None:
+        return np.arange(index['size'])
+    # Prefix and suffix must not overlap ("ab*ba" should not match "aba")
+    return positions[index['name_lengths'][positions] >= len(head) + len(tail)]
+
+
+# Each filter is (rows matched, function listing those positions, function testing
+# given positions against the filter). Only the most selective filter is listed.
+def _positions_filter(index, positions):
+    return len(positions), lambda: positions, lambda rows: _position_mask(index['size'], positions)[rows]
+
+
+def _category_filter(index, column, labels):
+    category = index['categories'][column]
+    wanted = np.zeros(len(category['label_codes']), dtype=bool)
+    wanted[[category['label_codes'][label] for label in labels]] = True
+    return (sum(len(category['positions'][label]) for label in labels),
+            lambda: np.concatenate([category['positions'][label] for label in labels]),
+            lambda rows: wanted[category['codes'][rows]])
+
+
+def _range_filter(index, column, low, high):
+    sorted_values, order, values = index['ranges'][column]
+    start = np.searchsorted(sorted_values, low, side='left')
+    end = np.searchsorted(sorted_values, high, side='right')
+    return (end - start, lambda: order[start:end],
+            lambda rows: (values[rows] >= low) & (values[rows] <= high))
+
+
+def select_functions(index, name_pattern='', services=(), environments=(), value_ranges=None):
+    filters = []
+    if name_pattern:
+        filters.append(_positions_filter(index, match_function_names(index, name_pattern)))
+    if services:
+        filters.append(_category_filter(index, 'Service', services))
+    if environments:
+        filters.append(_category_filter(index, 'Environment', environments))
+    for column, (low, high) in (value_ranges or {}).items():
+        sorted_values = index['ranges'][column][0]
+        if low <= sorted_values[0] and high >= sorted_values[-1]:
+            continue  # Full range selected, nothing to filter
+        filters.append(_range_filter(index, column, low, high))
+    
+    if not filters:
+        return np.arange(index['size'])
+    
+    # List the positions of the most selective filter, then narrow them with the
+    # others' row tests, so the work follows the smallest match, not the fleet
+    filters.sort(key=lambda f: f[0])
+    selected = filters[0][1]()
+    for _, _, keep in filters[1:]:
+        if len(selected) == 0:
+            break
+        selected = selected[keep(selected)]
+    
+    # Return positions in row order; mark-and-scan is cheaper than sorting large sets
+    if len(selected) > 1 and np.any(selected[1:] < selected[:-1]):
+        if len(selected) * 32 < index['size']:
+            selected = np.sort(selected)
+        else:
+            selected = np.flatnonzero(_position_mask(index['size'], selected))
+    return selected
+
+
+fleet_key = fleet_fingerprint(df)
+function_index = build_function_index(df, fleet_key)
+fleet_df = df  # Unfiltered inventory, used for snapshots
+
+st.sidebar.header("🔎 Function Filters")
+name_pattern = st.sidebar.text_input("Function name", placeholder="e.g. payments-* or *-prod").strip()
+selected_services = st.sidebar.multiselect("Service family", sorted(function_index['categories']['Service']['label_codes']))
+selected_environments = st.sidebar.multiselect("Environment", sorted(function_index['categories']['Environment']['label_codes']))
+
+value_ranges = {}
+for column, label in RANGE_INDEX_COLUMNS.items():
+    sorted_values = function_index['ranges'][column][0]
+    low, high = sorted_values[0].item(), sorted_values[-1].item()
+    if low < high:
+        value_ranges[column] = st.sidebar.slider(label, low, high, (low, high))
+
+select_start = time.perf_counter()
+selection = select_functions(function_index, name_pattern, selected_services,
+                             selected_environments, value_ranges)
+select_ms = (time.perf_counter() - select_start) * 1000
+selection_key = hash((fleet_key, selection.tobytes()))  # Identifies the filtered fleet for caches and background jobs
+st.sidebar.caption(f"Showing {len(selection)} of {function_index['size']} functions (selected in {select_ms:.2f} ms)")
+
+if len(selection) == 0:
+    st.warning("No functions match the current filters. Adjust the sidebar filters to continue.")
+    st.stop()
+if len(selection) < function_index['size']:
+    df = df.iloc[selection].reset_index(drop=True)
+
+
+# ============================================================================
+# COST ROLLUP CUBE (SERVICE -> ENVIRONMENT -> COMPONENT)
+# ============================================================================
+def cost_components(df):
+    # Split each function's actual cost into the pricing engine's components, with
+    # whatever the engine does not explain as 'Other'. Components are taken in turn
+    # and capped at the cost still unallocated, so all of them stay non-negative
+    # and together sum to CostUSD.
+    remaining = df['CostUSD'].to_numpy(dtype=float).copy()
+    allocated = {}
+    for component, column in [('Data Transfer', 'TransferCostUSD'), ('Compute', 'ComputeCostUSD'),
+                              ('Provisioned Concurrency', 'PCCostUSD'), ('Requests', 'RequestCostUSD')]:
+        allocated[component] = np.minimum(df[column].to_numpy(dtype=float), remaining)
+        remaining = remaining - allocated[component]
+    allocated['Other'] = remaining
+    return np.column_stack([allocated[c] for c in COST_COMPONENTS])
+
+
+def _cube_rollups(base, dimensions):
+    # Every roll-up (all subsets of the dimensions) of a base array, so drill-down
+    # and roll-up are dictionary lookups rather than new groupbys
+    rollups = {}
+    for mask in range(2 ** len(dimensions)):
+        kept = tuple(d for i, d in enumerate(dimensions) if mask & (1 << i))
+        dropped = tuple(i for i, d in enumerate(dimensions) if d not in kept)
+        rollups[kept] = base.sum(axis=dropped) if dropped else base.copy()
+    return rollups
+
+
+def _cube_coords(cube, frame):
+    # Per-row service and environment codes in the cube's fixed label grid. A few
+    # rows (incremental updates) use plain dict lookups so the cost is O(rows);
+    # larger frames are vectorized, which costs O(rows + labels).
+    coords = {}
+    for d in ('Service', 'Environment'):
+        if len(frame) < len(cube['labels'][d]):
+            coords[d] = np.fromiter((cube['codes'][d][label] for label in frame[d]), dtype='int64', count=len(frame))
+        else:
+            coords[d] = pd.Categorical(frame[d], categories=cube['labels'][d]).codes.astype('int64')
+            if (coords[d] < 0).any():
+                raise KeyError(f"{d} label not in the cost cube")
+    return coords
+
+
+def _cube_base(cube, frame):
+    # Cost per service x environment x component, and functions per service x
+    # environment, from one bincount per component over the flattened grid
+    n_services, n_environments = len(cube['labels']['Service']), len(cube['labels']['Environment'])
+    coords = _cube_coords(cube, frame)
+    cells = coords['Service'] * n_environments + coords['Environment']
+    components = cost_components(frame)
+    base = np.stack([
+        np.bincount(cells, weights=components[:, k], minlength=n_services * n_environments)
+        for k in range(len(COST_COMPONENTS))
+    ], axis=-1).reshape(n_services, n_environments, len(COST_COMPONENTS))
+    counts = np.bincount(cells, minlength=n_services * n_environments).reshape(n_services, n_environments)
+    return base, counts
+
+
+@st.cache_data(max_entries=COST_CUBE_CACHE_ENTRIES)
+def build_cost_cube(_df, key, services, environments):
+    # key identifies _df (fleet and selection), which Streamlit does not hash.
+    # Labels span the whole fleet so any function can later be added in place.
+    cube = {
+        'labels': {
+            'Service': np.array(services, dtype=object),
+            'Environment': np.array(environments, dtype=object),
+            'Component': COST_COMPONENTS,
+        },
+        'codes': {
+            'Service': {label: code for code, label in enumerate(services)},
+            'Environment': {label: code for code, label in enumerate(environments)},
+        },
+    }
+    base, counts = _cube_base(cube, _df)
+    cube['sums'] = _cube_rollups(base, CUBE_DIMENSIONS)
+    cube['counts'] = _cube_rollups(counts, CUBE_DIMENSIONS[:-1])
+    return cube
+
+
+def rollup_cost_cube(cube, dimensions, services=None):
+    # One row per non-empty cell of a roll-up level; services limits it to those
+    # service families. Cells come from np.nonzero on the function counts, so only
+    # services/environments with functions in the selection are ever materialized.
+    key = tuple(d for d in CUBE_DIMENSIONS if d in dimensions)
+    values = cube['sums'][key]
+    if not key:
+        return pd.DataFrame({'CostUSD': [float(values)]})
+    
+    group_key = tuple(d for d in key if d != 'Component')
+    labels = {d: np.asarray(cube['labels'][d], dtype=object) for d in group_key}
+    counts = cube['counts'][group_key] if group_key else None
+    if services is not None and 'Service' in group_key:
+        codes = np.array([cube['codes']['Service'][s] for s in services], dtype='int64')
+        labels['Service'], values, counts = labels['Service'][codes], values[codes], counts[codes]
+    
+    cells = np.nonzero(counts) if group_key else ()
+    rollup = {d: labels[d][c] for d, c in zip(group_key, cells)}
+    cell_values = values[cells]
+    if 'Component' in key:
+        # Each cell expands to one row per component, in COST_COMPONENTS order
+        n_cells = len(cells[0]) if cells else 1
+        rollup = {d: np.repeat(v, len(COST_COMPONENTS)) for d, v in rollup.items()}
+        rollup['Component'] = np.tile(np.asarray(COST_COMPONENTS, dtype=object), n_cells)
+    rollup['CostUSD'] = np.ravel(cell_values)
+    return pd.DataFrame(rollup)
+
+
+def update_cost_cube(cube, frame, sign=1):
+    # Incrementally add (sign=1) or remove (sign=-1) the functions in frame. Each
+    # cached roll-up gets a scatter-add into just the cells those rows touch, so
+    # the cost follows the number of rows changed, not the size of the cube.
+    if len(frame) == 0:
+        return cube
+    coords = _cube_coords(cube, frame)
+    components = sign * cost_components(frame)
+    for name, deltas in [('sums', components), ('counts', np.full(len(frame), sign))]:
+        for kept, values in cube[name].items():
+            cells = tuple(coords[d] for d in kept if d != 'Component')
+            if 'Component' not in kept and deltas.ndim > 1:
+                row_deltas = deltas.sum(axis=1)
+            else:
+                row_deltas = deltas
+            if cells:
+                np.add.at(values, cells, row_deltas)
+            else:
+                cube[name][kept] = values + row_deltas.sum(axis=0)
+    return cube
+
+
+def selection_cost_cube(index, fleet, selection, selected_df, key):
+    # A filter change usually adds or removes a few functions (dragging a range
+    # slider, adding a service), so the session's cube is patched with just those
+    # rows. Changes touching more rows than the selection holds rebuild it instead.
+    state = st.session_state.get('cost_cube')
+    if state is not None and state['key'] == key:
+        return state['cube']
+    cube = None
+    if state is not None and state['fingerprint'] == index['fingerprint']:
+        before = _position_mask(index['size'], state['selection'])
+        after = _position_mask(index['size'], selection)
+        added = np.flatnonzero(after & ~before)
+        removed = np.flatnonzero(before & ~after)
+        if len(added) + len(removed) <= len(selection):
+            cube = state['cube']
+            update_cost_cube(cube, fleet.iloc[added])
+            update_cost_cube(cube, fleet.iloc[removed], sign=-1)
+    if cube is None:
+        categories = index['categories']
+        cube = build_cost_cube(selected_df, key, tuple(sorted(categories['Service']['label_codes'])),
+                               tuple(sorted(categories['Environment']['label_codes'])))
+    st.session_state['cost_cube'] = {'key': key, 'fingerprint': index['fingerprint'],
+                                     'selection': selection, 'cube': cube}
+    return cube
+
+
+cost_cube = selection_cost_cube(function_index, fleet_df, selection, df, selection_key)
+
+
+# ============================================================================
+# ANOMALY DETECTION
+# ============================================================================
+def score_anomalies(df):
+    invocations = df['InvocationsPerMonth'].where(df['InvocationsPerMonth'] > 0)
+    metrics = pd.DataFrame({
+        'CostPerInvocation': df['CostUSD'] / invocations,
+        'CostPerGBSecond': df['CostUSD'] / (df['GBSeconds'] + 0.01),
+        'ColdStartRate': df['ColdStartRate'],
+        'TransferPerInvocation': df['DataTransferGB'] / invocations,
+    })
+    # Compare ratios on a log scale so a 10x outlier counts the same at any magnitude
+    values = metrics.copy()
+    values[ANOMALY_LOG_METRICS] = np.log10(values[ANOMALY_LOG_METRICS].where(values[ANOMALY_LOG_METRICS] > 0))
+    
+    # Modified z-score per environment peer group: (x - median) / (1.4826 * MAD),
+    # falling back to the mean absolute deviation when more than half the group ties
+    peers = df['Environment']
+    median = values.groupby(peers).transform('median')
+    deviation = (values - median).abs()
+    mad = deviation.groupby(peers).transform('median') * 1.4826
+    mean_ad = deviation.groupby(peers).transform('mean') * 1.2533
+    scale = mad.where(mad > 0, mean_ad).where(lambda x: x > 0)
+    z_scores = ((values - median) / scale).fillna(0.0)
+    
+    group_size = peers.map(peers.value_counts())
+    z_scores[group_size.to_numpy() < ANOMALY_MIN_PEER_GROUP] = 0.0
+    
+    # Only the high side is a problem (expensive, cold, chatty), so score on positive z
+    upper = z_scores.clip(lower=0)
+    result = pd.concat([df[['FunctionName', 'Environment', 'CostUSD']], metrics, z_scores.add_suffix('_z')], axis=1)
+    result['AnomalyScore'] = upper.max(axis=1)
+    result['Driver'] = upper.idxmax(axis=1).map(ANOMALY_METRICS).where(result['AnomalyScore'] > 0, '')
+    return result.sort_values('AnomalyScore', ascending=False)
+
+
+# ============================================================================
+# SNAPSHOT STORE & MONTH-OVER-MONTH DIFF
+# ============================================================================
+def snapshot_path(month):
+    return SNAPSHOT_DIR / f"month={month}" / "part-0.parquet"
+
+
+def list_snapshot_months():
+    if not SNAPSHOT_DIR.exists():
+        return []
+    return sorted(p.parent.name.split('=', 1)[1] for p in SNAPSHOT_DIR.glob('month=*/part-0.parquet'))
+
+
+def save_snapshot(df, month):
+    path = snapshot_path(month)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    snapshot = df[list(SNAPSHOT_DTYPES)].astype(SNAPSHOT_DTYPES)
+    # Write to a temp file first so readers never see a half-written partition
+    tmp_path = path.with_suffix('.tmp')
+    snapshot.to_parquet(tmp_path, index=False, row_group_size=256_000)
+    tmp_path.replace(path)
+
+
+@st.cache_data
+def load_snapshot(month, modified_ns):
+    # modified_ns is only part of the cache key, so overwriting a month reloads it
+    return pd.read_parquet(snapshot_path(month), columns=list(SNAPSHOT_DTYPES)).astype(SNAPSHOT_DTYPES)
+
+
+def diff_snapshots(before, after):
+    # Hash join on FunctionName; only the compared columns take part in the merge
+    columns = ['FunctionName', 'Environment'] + DIFF_METRICS
+    merged = before[columns].merge(after[columns], on='FunctionName', how='outer',
+                                   suffixes=('_before', '_after'), indicator=True)
+    
+    for metric in DIFF_METRICS:
+        merged[f'{metric}_delta'] = merged[f'{metric}_after'].fillna(0) - merged[f'{metric}_before'].fillna(0)
+    merged['Environment'] = merged['Environment_after'].astype('string').fillna(merged['Environment_before'].astype('string'))
+    merged['CostDeltaPct'] = (merged['CostUSD_delta'] / merged['CostUSD_before'].where(merged['CostUSD_before'] > 0)) * 100
+    
+    regressed = ((merged['CostUSD_delta'] >= REGRESSION_MIN_DELTA_USD)
+                 & (merged['CostDeltaPct'] >= REGRESSION_MIN_DELTA_PCT))
+    improved = ((merged['CostUSD_delta'] <= -REGRESSION_MIN_DELTA_USD)
+                & (merged['CostDeltaPct'] <= -REGRESSION_MIN_DELTA_PCT))
+    merged['Status'] = np.select(
+        [merged['_merge'] == 'right_only', merged['_merge'] == 'left_only', regressed, improved],
+        ['New', 'Removed', 'Regressed', 'Improved'],
+        default='Unchanged'
+    )
+    
+    # Right-sizing recommendations that were acted on between the snapshots
+    both = merged['_merge'] == 'both'
+    merged['MemoryReduced'] = both & (merged['MemoryMB_delta'] < 0)
+    merged['PCReduced'] = both & (merged['ProvisionedConcurrency_delta'] < 0)
+    return merged.drop(columns=['_merge', 'Environment_before', 'Environment_after'])
+
+# ============================================================================
+# RECOMMENDATION SETS
+# ============================================================================
+# Each builder works on any slice of the fleet and returns numeric, typed columns.
+# Thresholds that depend on the whole fleet come from recommendation_stats so
+# that exports can build the same sets chunk by chunk.
+def recommendation_stats(df):
+    return {
+        'max_memory_mb': df['MemoryMB'].max(),
+        'max_duration_ms': df['AvgDurationMs'].max(),
+        'total_invocations': df['InvocationsPerMonth'].sum(),
+        'median_invocations': df['InvocationsPerMonth'].median(),
+        'median_gb_seconds': df['GBSeconds'].median(),
+    }
+
+
+def _typed(frame):
+    # Text columns as the nullable string dtype so every chunk has the same schema
+    text_columns = [c for c in frame.columns if not pd.api.types.is_numeric_dtype(frame[c])]
+    return frame.astype({c: 'string' for c in text_columns}).reset_index(drop=True)
+
+
+def memory_rightsizing_recommendations(frame, stats):
+    memory_score = (frame['MemoryMB'] / stats['max_memory_mb']) - (frame['AvgDurationMs'] / stats['max_duration_ms'])
+    recs = frame[memory_score > 0.5]
+    # Simulate 20% memory reduction at unchanged duration: compute and PC charges
+    # scale with memory, requests and data transfer do not. Charges are capped at
+    # what the function actually pays (cost_components), so savings never exceed its bill
+    paid = pd.DataFrame(cost_components(recs), columns=COST_COMPONENTS, index=recs.index)
+    recommended_memory = (recs['MemoryMB'] * 0.8).astype('int64')
+    estimated_cost = recs['CostUSD'] - 0.2 * (paid['Compute'] + paid['Provisioned Concurrency'])
+    return _typed(pd.DataFrame({
+        'FunctionName': recs['FunctionName'],
+        'Environment': recs['Environment'],
+        'MemoryMB': recs['MemoryMB'].astype('int64'),
+        'RecommendedMemoryMB': recommended_memory,
+        'CostUSD': recs['CostUSD'],
+        'EstimatedCostUSD': estimated_cost,
+        'SavingsUSD': recs['CostUSD'] - estimated_cost,
+    }))
+
+
+def pc_recommendations(frame):
+    with_pc = frame[frame['ProvisionedConcurrency'] > 0]
+    cold_start = with_pc['ColdStartRate']
+    action = pd.Series(np.select([cold_start < 0.01, cold_start > 0.05],
+                                 ['REDUCE PC', 'INCREASE PC'], default='MAINTAIN'), index=with_pc.index)
+    recs = with_pc[action != 'MAINTAIN']
+    action = action[action != 'MAINTAIN']
+    # Dropping one PC unit saves its modeled price, capped at the PC cost actually paid
+    paid_pc = cost_components(recs)[:, COST_COMPONENTS.index('Provisioned Concurrency')]
+    unit_savings = np.minimum(recs['PCUnitCostUSD'].to_numpy(dtype=float), paid_pc)
+    return _typed(pd.DataFrame({
+        'FunctionName': recs['FunctionName'],
+        'Environment': recs['Environment'],
+        'ProvisionedConcurrency': recs['ProvisionedConcurrency'].astype('int64'),
+        'ColdStartRate': recs['ColdStartRate'],
+        'Action': action,
+        'Reasoning': action.map(PC_ACTION_REASONS),
+        'SavingsUSD': np.where(action == 'REDUCE PC', unit_savings, 0.0),
+    }))
+
+
+def cleanup_recommendations(frame, stats):
+    invocation_pct = (frame['InvocationsPerMonth'] / stats['total_invocations']) * 100
+    recs = frame[(invocation_pct < 0.1) & frame['Environment'].isin(['development', 'staging'])]
+    return _typed(pd.DataFrame({
+        'FunctionName': recs['FunctionName'],
+        'Environment': recs['Environment'],
+        'InvocationsPerMonth': recs['InvocationsPerMonth'].astype('int64'),
+        'InvocationPct': invocation_pct[recs.index],
+        'CostUSD': recs['CostUSD'],
+        'SavingsUSD': recs['CostUSD'],  # Deleting the function saves its whole cost
+    }))
+
+
+def containerization_scores(frame, stats):
+    score = pd.Series(0, index=frame.index)
+    score += (frame['AvgDurationMs'] > 3000) * 3  # Long-running (>3s)
+    score += (frame['MemoryMB'] > 2048) * 2  # High memory (>2GB)
+    score += (frame['InvocationsPerMonth'] < stats['median_invocations']) * 1  # Low invocation frequency
+    score += (frame['GBSeconds'] > stats['median_gb_seconds']) * 1  # High GB-Seconds consumption
+    return score
+
+
+def containerization_recommendations(frame, stats):
+    score = containerization_scores(frame, stats)
+    recs = frame[score >= 4]
+    # Swap the Lambda compute, request and PC charges actually paid (capped split
+    # from cost_components) for Fargate task time; data transfer and anything the
+    # engine does not model stay as they are
+    paid = pd.DataFrame(cost_components(recs), columns=COST_COMPONENTS, index=recs.index)
+    replaced = paid['Compute'] + paid['Requests'] + paid['Provisioned Concurrency']
+    fargate_cost = (recs['CostUSD'] - replaced + recs['FargateComputeUSD']).clip(lower=0)
+    return _typed(pd.DataFrame({
+        'FunctionName': recs['FunctionName'],
+        'Environment': recs['Environment'],
+        'ContainerizationScore': score[recs.index].astype('int64'),
+        'AvgDurationMs': recs['AvgDurationMs'],
+        'MemoryMB': recs['MemoryMB'].astype('int64'),
+        'InvocationsPerMonth': recs['InvocationsPerMonth'].astype('int64'),
+        'LambdaCostUSD': recs['CostUSD'],
+        'FargateCostUSD': fargate_cost,
+        'SavingsUSD': recs['CostUSD'] - fargate_cost,
+    }))
+
+
+def selected_rows(frame, selection):
+    # Account-wide results narrowed to the functions selected in the sidebar
+    if len(selection) < len(frame):
+        return frame.iloc[selection].reset_index(drop=True)
+    return frame
+
+
+def forecast_results(frame, catalog, invocation_growth, memory_change, duration_change):
+    # Re-prices the whole account under the scenario and applies the modeled change
+    # to each function's actual cost, so a 0% scenario forecasts today's bill
+    invocations = frame['InvocationsPerMonth'] * (1 + invocation_growth/100)
+    memory = frame['MemoryMB'] * (1 + memory_change/100)
+    duration = frame['AvgDurationMs'] * (1 + duration_change/100)
+    forecast_priced = price_fleet(frame, catalog, invocations, memory, duration)
+    gb_seconds = forecast_priced['ModeledGBSeconds']
+    forecast_cost = (frame['CostUSD'] + forecast_priced['ModeledCostUSD'] - frame['ModeledCostUSD']).clip(lower=0)
+    return _typed(pd.DataFrame({
+        'FunctionName': frame['FunctionName'],
+        'Environment': frame['Environment'],
+        'CostUSD': frame['CostUSD'],
+        'ForecastInvocations': invocations,
+        'ForecastMemoryMB': memory,
+        'ForecastDurationMs': duration,
+        'ForecastGBSeconds': gb_seconds,
+        'ForecastCostUSD': forecast_cost,
+        'ChangeUSD': forecast_cost - frame['CostUSD'],
+    }))
+
+
+rec_stats = recommendation_stats(df)
+
+
+# ============================================================================
+# STREAMING EXPORT
+# ============================================================================
+def iter_chunks(df, build_fn):
+    for start in range(0, len(df), EXPORT_CHUNK_ROWS):
+        yield build_fn(df.iloc[start:start + EXPORT_CHUNK_ROWS])
+
+
+def write_export(chunks, path, fmt):
+    # Streams chunks to disk one at a time: Parquet row groups, gzip CSV members
+    # of one stream, or newline-delimited JSON. Returns the number of rows written.
+    rows = 0
+    if fmt == 'Parquet':
+        # Imported here so pyarrow's load time is only paid when exporting Parquet
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema, compression='zstd')
+                writer.write_table(table.cast(writer.schema))
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    elif fmt == 'CSV (gzip)':
+        with gzip.open(path, 'wt', newline='') as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, header=(i == 0), index=False)
+                rows += len(chunk)
+    elif fmt == 'NDJSON':
+        with open(path, 'w') as f:
+            for chunk in chunks:
+                if len(chunk) > 0:
+                    f.write(chunk.to_json(orient='records', lines=True).rstrip('\n') + '\n')
+                rows += len(chunk)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return rows
+
+
+# ============================================================================
+# BACKGROUND ANALYSES & PROGRESSIVE RENDERING
+# ============================================================================
+@st.cache_resource
+def get_analysis_executor():
+    return ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix='analysis')
+
+
+def _run_analysis(cancelled, fn, args):
+    if cancelled.is_set():  # Superseded while still queued
+        return None
+    return fn(*args)
+
+
+def submit_analysis(name, key, fn, *args):
+    # One job per analysis name and session. Reuses the job if its inputs (key)
+    # are unchanged; otherwise the superseded job is cancelled so that dragging a
+    # slider does not queue up stale work.
+    jobs = st.session_state.setdefault('analysis_jobs', {})
+    job = jobs.get(name)
+    if job is not None and job['key'] == key:
+        return job
+    if job is not None:
+        job['cancelled'].set()
+        job['future'].cancel()
+    cancelled = threading.Event()
+    job = {
+        'key': key,
+        'cancelled': cancelled,
+        'future': get_analysis_executor().submit(_run_analysis, cancelled, fn, args),
+    }
+    jobs[name] = job
+    return job
+
+
+@st.fragment(run_every=ANALYSIS_POLL_SECONDS)
+def _poll_analysis(future):
+    # Reruns on its own every poll interval without holding the script thread, so
+    # widget changes are acted on at once; a finished job triggers a full rerun,
+    # which draws the result in place
+    if future.done() and st.runtime.exists():
+        st.rerun()
+
+
+def render_analysis(name, job, render_fn):
+    # Draw a finished job straight away. Otherwise show the previous result (or a
+    # spinner note) and poll until the job is done. render_fn(result, key) must
+    # prefix chart/table keys with `key`, so previous and fresh results never clash.
+    future = job['future']
+    if future.done():
+        try:
+            result = future.result()
+        except Exception as exc:
+            st.exception(exc)
+            return
+        st.session_state.setdefault('analysis_results', {})[name] = result
+        render_fn(result, f'{name}-latest')
+        return
+    previous = st.session_state.get('analysis_results', {}).get(name)
+    if previous is not None:
+        st.caption("⏳ Showing previous results while this analysis refreshes...")
+        render_fn(previous, f'{name}-previous')
+    else:
+        st.info("⏳ Computing in the background...")
+    _poll_analysis(future)
+
+
 # ============================================================================
 # DASHBOARD HEADER
 # ============================================================================
@@ -178,13 +1139,15 @@ st.markdown("---")
 # ============================================================================
 # NAVIGATION TABS
 # ============================================================================
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
     "📊 Exercise 1: Top Cost Contributors",
     "💾 Exercise 2: Memory Right-Sizing",
     "⚡ Exercise 3: Provisioned Concurrency",
     "🗑️ Exercise 4: Unused Workloads",
     "📈 Exercise 5: Cost Forecasting",
-    "🐳 Exercise 6: Containerization Candidates"
+    "🐳 Exercise 6: Containerization Candidates",
+    "📅 Month-over-Month",
+    "🚨 Anomalies"
 ])
 
 # ============================================================================
@@ -216,7 +1179,7 @@ with tab1:
     st.subheader("Top 20 Functions by Cost")
     top_20 = df_sorted.head(20)
     
-    fig1 = make_subplots(specs=[[{"secondary_y": True}]])
+    fig1 = plotly_subplots.make_subplots(specs=[[{"secondary_y": True}]])
     fig1.add_trace(
         go.Bar(x=top_20['FunctionName'], y=top_20['CostUSD'], name="Monthly Cost", marker_color='#1f77b4'),
         secondary_y=False
@@ -244,12 +1207,61 @@ with tab1:
     
     # Environment breakdown
     st.subheader("Cost Breakdown by Environment")
-    env_cost = df.groupby('Environment')['CostUSD'].sum().sort_values(ascending=False)
-    fig3 = px.pie(values=env_cost.values, names=env_cost.index, 
+    env_cost = rollup_cost_cube(cost_cube, ['Environment']).sort_values('CostUSD', ascending=False)
+    fig3 = px.pie(values=env_cost['CostUSD'], names=env_cost['Environment'], 
                   title='Cost Distribution by Environment',
                   color_discrete_sequence=['#1f77b4', '#ff7f0e', '#2ca02c'])
     st.plotly_chart(fig3, use_container_width=True)
     
+    # Hierarchical rollup: service family -> environment -> cost component
+    st.subheader("Cost Rollup: Service → Environment → Component")
+    service_costs = rollup_cost_cube(cost_cube, ['Service']).sort_values('CostUSD', ascending=False)
+    top_services = service_costs['Service'].head(ROLLUP_TOP_SERVICES).tolist()
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        rollup_chart = st.radio("Chart type", ["Treemap", "Sunburst"], horizontal=True)
+    with col2:
+        drill_service = st.selectbox("Drill into service",
+                                     ["All services"] + service_costs['Service'].head(ROLLUP_DRILL_CHOICES).tolist())
+    with col3:
+        rollup_level = st.selectbox("Roll up to", ["Service", "Environment", "Component",
+                                                   "Service × Environment"])
+    
+    # The chart is drawn from rolled-up levels, so its size stays fixed however
+    # many services the fleet has
+    if drill_service == "All services":
+        rollup_cells = rollup_cost_cube(cost_cube, CUBE_DIMENSIONS, services=top_services)
+        other_services = len(service_costs) - len(top_services)
+        if other_services > 0:
+            # Everything outside the top services, by environment and component
+            other = rollup_cost_cube(cost_cube, ['Environment', 'Component'])
+            top_cost = rollup_cells.groupby(['Environment', 'Component'])['CostUSD'].sum()
+            other_keys = pd.MultiIndex.from_frame(other[['Environment', 'Component']])
+            other['CostUSD'] = (other['CostUSD'] - top_cost.reindex(other_keys, fill_value=0).to_numpy()).clip(lower=0).round(6)
+            other['Service'] = f"Other services ({other_services})"
+            rollup_cells = pd.concat([rollup_cells, other], ignore_index=True)
+        chart_title = f'Monthly Cost by Service Family (top {ROLLUP_TOP_SERVICES}), Environment and Component'
+        chart_path = [px.Constant('All functions'), 'Service', 'Environment', 'Component']
+    else:
+        rollup_cells = rollup_cost_cube(cost_cube, CUBE_DIMENSIONS, services=[drill_service])
+        chart_title = f'Monthly Cost of {drill_service} by Environment and Component'
+        chart_path = [px.Constant(drill_service), 'Environment', 'Component']
+    rollup_cells = rollup_cells[rollup_cells['CostUSD'] > 0]
+    chart_fn = px.treemap if rollup_chart == "Treemap" else px.sunburst
+    fig4 = chart_fn(rollup_cells, path=chart_path, values='CostUSD', color='Environment',
+                    title=f'{chart_title} (click to drill down)')
+    st.plotly_chart(fig4, use_container_width=True)
+    
+    rollup_table = rollup_cost_cube(cost_cube, rollup_level.split(' × '),
+                                    services=None if drill_service == "All services" else [drill_service])
+    rollup_table = rollup_table[rollup_table['CostUSD'] > 0]
+    if len(rollup_table) > ROLLUP_TABLE_ROWS:
+        st.caption(f"Showing the {ROLLUP_TABLE_ROWS} most expensive of {len(rollup_table)} rows")
+    rollup_table = rollup_table.nlargest(ROLLUP_TABLE_ROWS, 'CostUSD')
+    rollup_table['CostUSD'] = rollup_table['CostUSD'].apply(lambda x: f"${x:.2f}")
+    st.dataframe(rollup_table, use_container_width=True, hide_index=True)
+    
     # Detailed table
     st.subheader("Top Cost Functions Table")
     display_df = top_20[['FunctionName', 'Environment', 'CostUSD', 'InvocationsPerMonth', 'AvgDurationMs', 'MemoryMB']].copy()
@@ -277,8 +1289,8 @@ with tab2:
     with col1:
         st.metric("Over-provisioned Functions", len(over_provisioned))
     with col2:
-        potential_savings = over_provisioned['CostUSD'].sum() * 0.15
-        st.metric("Potential Savings (15% reduction)", f"${potential_savings:.2f}")
+        potential_savings = memory_rightsizing_recommendations(over_provisioned, rec_stats)['SavingsUSD'].sum()
+        st.metric("Potential Savings (20% memory cut)", f"${potential_savings:.2f}")
     
     # Chart 1: Duration vs Memory (Bubble chart)
     st.subheader("Duration vs Memory Allocation")
@@ -301,29 +1313,19 @@ with tab2:
     st.subheader("Memory Reduction Recommendations")
     
     # Calculate potential cost reduction with memory optimization
-    recommendations = []
-    for idx, row in over_provisioned.head(15).iterrows():
-        current_cost = row['CostUSD']
-        # Simulate 20% memory reduction
-        new_memory = row['MemoryMB'] * 0.8
-        memory_ratio = new_memory / row['MemoryMB']
-        estimated_new_cost = current_cost * memory_ratio
-        savings = current_cost - estimated_new_cost
-        
-        recommendations.append({
-            'Function': row['FunctionName'],
-            'Environment': row['Environment'],
-            'Current Memory (MB)': int(row['MemoryMB']),
-            'Recommended Memory (MB)': int(new_memory),
-            'Current Cost': f"${current_cost:.2f}",
-            'Estimated New Cost': f"${estimated_new_cost:.2f}",
-            'Potential Savings': f"${savings:.2f}"
-        })
-    
-    rec_df = pd.DataFrame(recommendations)
+    memory_recs = memory_rightsizing_recommendations(over_provisioned.head(15), rec_stats)
+    rec_df = pd.DataFrame({
+        'Function': memory_recs['FunctionName'],
+        'Environment': memory_recs['Environment'],
+        'Current Memory (MB)': memory_recs['MemoryMB'],
+        'Recommended Memory (MB)': memory_recs['RecommendedMemoryMB'],
+        'Current Cost': memory_recs['CostUSD'].apply(lambda x: f"${x:.2f}"),
+        'Estimated New Cost': memory_recs['EstimatedCostUSD'].apply(lambda x: f"${x:.2f}"),
+        'Potential Savings': memory_recs['SavingsUSD'].apply(lambda x: f"${x:.2f}")
+    })
     st.dataframe(rec_df, use_container_width=True, hide_index=True)
     
-    total_potential_savings = sum([float(r['Potential Savings'].replace('$', '')) for r in recommendations])
+    total_potential_savings = memory_recs['SavingsUSD'].sum()
     st.markdown(f"""
     <div class="success-box">
     <strong>Total Potential Savings (Top 15 functions):</strong> ${total_potential_savings:.2f}/month
@@ -400,37 +1402,21 @@ with tab3:
     # Recommendations for PC optimization
     st.subheader("Provisioned Concurrency Optimization Recommendations")
     
-    pc_recommendations = []
-    for idx, row in with_pc.iterrows():
-        if row['ColdStartRate'] < 0.01:  # Low cold start rate
-            action = "REDUCE PC"
-            reasoning = "Low cold start rate, PC may be overkill"
-            potential_savings = row['CostUSD'] * 0.10
-        elif row['ColdStartRate'] > 0.05:  # High cold start rate
-            action = "INCREASE PC"
-            reasoning = "High cold start rate, consider more PC units"
-            potential_savings = 0
-        else:
-            action = "MAINTAIN"
-            reasoning = "Balanced PC configuration"
-            potential_savings = 0
-        
-        if action != "MAINTAIN":
-            pc_recommendations.append({
-                'Function': row['FunctionName'],
-                'Environment': row['Environment'],
-                'Current PC': int(row['ProvisionedConcurrency']),
-                'Cold Start Rate': f"{row['ColdStartRate']*100:.2f}%",
-                'Action': action,
-                'Reasoning': reasoning,
-                'Potential Savings': f"${potential_savings:.2f}"
-            })
-    
-    if pc_recommendations:
-        pc_rec_df = pd.DataFrame(pc_recommendations)
+    pc_recs = pc_recommendations(with_pc)
+    
+    if len(pc_recs) > 0:
+        pc_rec_df = pd.DataFrame({
+            'Function': pc_recs['FunctionName'],
+            'Environment': pc_recs['Environment'],
+            'Current PC': pc_recs['ProvisionedConcurrency'],
+            'Cold Start Rate': pc_recs['ColdStartRate'].apply(lambda x: f"{x*100:.2f}%"),
+            'Action': pc_recs['Action'],
+            'Reasoning': pc_recs['Reasoning'],
+            'Potential Savings': pc_recs['SavingsUSD'].apply(lambda x: f"${x:.2f}")
+        })
         st.dataframe(pc_rec_df, use_container_width=True, hide_index=True)
         
-        total_pc_savings = sum([float(r['Potential Savings'].replace('$', '')) for r in pc_recommendations])
+        total_pc_savings = pc_recs['SavingsUSD'].sum()
         st.markdown(f"""
         <div class="success-box">
         <strong>Total Potential Savings from PC Optimization:</strong> ${total_pc_savings:.2f}/month
@@ -495,7 +1481,7 @@ with tab4:
     # Recommendations
     st.subheader("Cleanup Recommendations")
     
-    unused_candidates = very_low_usage[very_low_usage['Environment'].isin(['development', 'staging'])].sort_values('CostUSD', ascending=False)
+    unused_candidates = cleanup_recommendations(df, rec_stats).sort_values('CostUSD', ascending=False)
     
     recommendations_text = []
     for idx, row in unused_candidates.head(10).iterrows():
@@ -519,17 +1505,10 @@ with tab4:
 # ============================================================================
 with tab5:
     st.header("Exercise 5: Cost Forecasting Model")
-    st.write("Build a predictive model: Cost ≈ Invocations × Duration × Memory × Coefficients + DataTransfer")
+    st.write("Build a predictive model: Cost ≈ Tiered Compute (Invocations × Duration × Memory) + Requests + Provisioned Concurrency + DataTransfer")
     
-    # Calculate pricing coefficients
-    # Simplified AWS Lambda pricing model
-    COMPUTE_COST_PER_GB_SECOND = 0.0000166667  # Approximate AWS Lambda compute pricing
-    TRANSFER_COST_PER_GB = 0.09  # Data transfer cost per GB
-    
-    df['CalculatedGBSeconds'] = (df['MemoryMB'] / 1024) * (df['AvgDurationMs'] / 1000) * df['InvocationsPerMonth']
-    df['CalculatedComputeCost'] = df['CalculatedGBSeconds'] * COMPUTE_COST_PER_GB_SECOND
-    df['CalculatedTransferCost'] = df['DataTransferGB'] * TRANSFER_COST_PER_GB
-    df['CalculatedTotalCost'] = df['CalculatedComputeCost'] + df['CalculatedTransferCost']
+    # Modeled cost comes from the pricing engine (see pricing_catalog.json)
+    df['CalculatedTotalCost'] = df['ModeledCostUSD']
     
     # Calculate accuracy
     df['CostError'] = abs(df['CostUSD'] - df['CalculatedTotalCost'])
@@ -564,15 +1543,14 @@ with tab5:
     
     # Chart 2: Cost Breakdown
     st.subheader("Cost Breakdown by Component")
-    compute_total = df['CalculatedComputeCost'].sum()
-    transfer_total = df['CalculatedTransferCost'].sum()
+    component_totals = df[['ComputeCostUSD', 'RequestCostUSD', 'PCCostUSD', 'TransferCostUSD']].sum()
     
     fig2 = go.Figure(data=[
-        go.Pie(labels=['Compute Cost', 'Data Transfer Cost'],
-               values=[compute_total, transfer_total],
+        go.Pie(labels=['Compute Cost', 'Request Cost', 'Provisioned Concurrency Cost', 'Data Transfer Cost'],
+               values=component_totals.values,
                hole=.3)
     ])
-    fig2.update_layout(title='Cost Distribution: Compute vs Data Transfer')
+    fig2.update_layout(title='Modeled Cost Distribution by Component')
     st.plotly_chart(fig2, use_container_width=True)
     
     # Forecasting section
@@ -586,44 +1564,46 @@ with tab5:
     with col3:
         duration_change = st.slider("Duration Change (%)", -50, 50, 0, 5)
     
-    # Calculate forecast
-    df['Forecasted_Invocations'] = df['InvocationsPerMonth'] * (1 + invocation_growth/100)
-    df['Forecasted_Memory'] = df['MemoryMB'] * (1 + memory_change/100)
-    df['Forecasted_Duration'] = df['AvgDurationMs'] * (1 + duration_change/100)
-    
-    df['Forecasted_GBSeconds'] = (df['Forecasted_Memory'] / 1024) * (df['Forecasted_Duration'] / 1000) * df['Forecasted_Invocations']
-    df['Forecasted_Cost'] = (df['Forecasted_GBSeconds'] * COMPUTE_COST_PER_GB_SECOND) + (df['DataTransferGB'] * TRANSFER_COST_PER_GB)
-    
-    current_total = df['CostUSD'].sum()
-    forecasted_total = df['Forecasted_Cost'].sum()
-    forecast_change = forecasted_total - current_total
-    forecast_change_pct = (forecast_change / current_total) * 100
-    
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.metric("Current Monthly Cost", f"${current_total:.2f}")
-    with col2:
-        st.metric("Forecasted Cost", f"${forecasted_total:.2f}")
-    with col3:
-        if forecast_change >= 0:
-            st.metric("Expected Change", f"+${forecast_change:.2f}", f"+{forecast_change_pct:.1f}%", delta_color="inverse")
-        else:
-            st.metric("Expected Change", f"-${abs(forecast_change):.2f}", f"{forecast_change_pct:.1f}%")
-    
-    # Chart 3: Forecast impact by environment
-    st.subheader("Forecast Impact by Environment")
-    forecast_by_env = df.groupby('Environment').agg({
-        'CostUSD': 'sum',
-        'Forecasted_Cost': 'sum'
-    }).reset_index()
-    forecast_by_env['Change'] = forecast_by_env['Forecasted_Cost'] - forecast_by_env['CostUSD']
-    
-    fig3 = go.Figure(data=[
-        go.Bar(name='Current', x=forecast_by_env['Environment'], y=forecast_by_env['CostUSD']),
-        go.Bar(name='Forecasted', x=forecast_by_env['Environment'], y=forecast_by_env['Forecasted_Cost'])
-    ])
-    fig3.update_layout(barmode='group', title='Cost Forecast by Environment')
-    st.plotly_chart(fig3, use_container_width=True)
+    # Calculate forecast: the scenario re-prices the whole account, since tiers and
+    # free tier depend on total usage, in the background for each slider setting
+    forecast_job = submit_analysis('forecast', (fleet_key, invocation_growth, memory_change, duration_change),
+                                   forecast_results, fleet_df.copy(deep=False), pricing_catalog,
+                                   invocation_growth, memory_change, duration_change)
+    
+    def render_forecast(forecast, key):
+        forecast = selected_rows(forecast, selection)
+        current_total = forecast['CostUSD'].sum()
+        forecasted_total = forecast['ForecastCostUSD'].sum()
+        forecast_change = forecasted_total - current_total
+        forecast_change_pct = (forecast_change / current_total) * 100
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Current Monthly Cost", f"${current_total:.2f}")
+        with col2:
+            st.metric("Forecasted Cost", f"${forecasted_total:.2f}")
+        with col3:
+            if forecast_change >= 0:
+                st.metric("Expected Change", f"+${forecast_change:.2f}", f"+{forecast_change_pct:.1f}%", delta_color="inverse")
+            else:
+                st.metric("Expected Change", f"-${abs(forecast_change):.2f}", f"{forecast_change_pct:.1f}%")
+        
+        # Chart 3: Forecast impact by environment
+        st.subheader("Forecast Impact by Environment")
+        forecast_by_env = forecast.groupby('Environment').agg({
+            'CostUSD': 'sum',
+            'ForecastCostUSD': 'sum'
+        }).reset_index()
+        forecast_by_env['Change'] = forecast_by_env['ForecastCostUSD'] - forecast_by_env['CostUSD']
+        
+        fig3 = go.Figure(data=[
+            go.Bar(name='Current', x=forecast_by_env['Environment'], y=forecast_by_env['CostUSD']),
+            go.Bar(name='Forecasted', x=forecast_by_env['Environment'], y=forecast_by_env['ForecastCostUSD'])
+        ])
+        fig3.update_layout(barmode='group', title='Cost Forecast by Environment')
+        st.plotly_chart(fig3, use_container_width=True, key=f'{key}-by-environment')
+    
+    render_analysis('forecast', forecast_job, render_forecast)
 
 
 # ============================================================================
@@ -638,21 +1618,7 @@ with tab6:
     # High memory (>2GB = 2048MB)
     # Low invocation frequency (relative to others)
     
-    df['Containerization_Score'] = 0
-    
-    # Long-running penalty
-    df.loc[df['AvgDurationMs'] > 3000, 'Containerization_Score'] += 3
-    
-    # High memory penalty
-    df.loc[df['MemoryMB'] > 2048, 'Containerization_Score'] += 2
-    
-    # Low invocation frequency (bottom 50%)
-    median_invocation = df['InvocationsPerMonth'].median()
-    df.loc[df['InvocationsPerMonth'] < median_invocation, 'Containerization_Score'] += 1
-    
-    # High GB-Seconds consumption
-    median_gb_seconds = df['GBSeconds'].median()
-    df.loc[df['GBSeconds'] > median_gb_seconds, 'Containerization_Score'] += 1
+    df['Containerization_Score'] = containerization_scores(df, rec_stats)
     
     containerization_candidates = df[df['Containerization_Score'] >= 4].sort_values('Containerization_Score', ascending=False)
     
@@ -663,8 +1629,8 @@ with tab6:
         container_cost = containerization_candidates['CostUSD'].sum()
         st.metric("Total Cost (Candidates)", f"${container_cost:.2f}")
     with col3:
-        container_savings = container_cost * 0.25  # Estimate 25% savings with containerization
-        st.metric("Est. Savings (25%)", f"${container_savings:.2f}")
+        container_savings = containerization_recommendations(containerization_candidates, rec_stats)['SavingsUSD'].sum()
+        st.metric("Est. Savings (vs Fargate)", f"${container_savings:.2f}")
     
     # Chart 1: Duration vs Memory (highlight candidates)
     st.subheader("Duration vs Memory: Containerization Candidates")
@@ -727,28 +1693,17 @@ with tab6:
     st.subheader("Estimated Cost Comparison: Lambda vs ECS/Fargate")
     
     if len(containerization_candidates) > 0:
-        sample = containerization_candidates.head(5)
-        
-        comparison_data = []
-        for idx, row in sample.iterrows():
-            lambda_cost = row['CostUSD']
-            # Rough estimate: ECS/Fargate is often 25-40% cheaper for long-running workloads
-            fargate_cost = lambda_cost * 0.7
-            savings = lambda_cost - fargate_cost
-            
-            comparison_data.append({
-                'Function': row['FunctionName'],
-                'Lambda Cost': f"${lambda_cost:.2f}",
-                'Est. Fargate Cost': f"${fargate_cost:.2f}",
-                'Monthly Savings': f"${savings:.2f}"
-            })
+        sample = containerization_recommendations(containerization_candidates.head(5), rec_stats)
         
-        comp_df = pd.DataFrame(comparison_data)
+        comp_df = pd.DataFrame({
+            'Function': sample['FunctionName'],
+            'Lambda Cost': sample['LambdaCostUSD'].apply(lambda x: f"${x:.2f}"),
+            'Est. Fargate Cost': sample['FargateCostUSD'].apply(lambda x: f"${x:.2f}"),
+            'Monthly Savings': sample['SavingsUSD'].apply(lambda x: f"${x:.2f}")
+        })
         st.dataframe(comp_df, use_container_width=True, hide_index=True)
         
-        total_lambda_cost = sum([float(r['Lambda Cost'].replace('$', '')) for r in comparison_data])
-        total_fargate_cost = sum([float(r['Est. Fargate Cost'].replace('$', '')) for r in comparison_data])
-        total_savings = total_lambda_cost - total_fargate_cost
+        total_savings = sample['SavingsUSD'].sum()
         
         st.markdown(f"""
         <div class="success-box">
@@ -756,6 +1711,234 @@ with tab6:
         </div>
         """, unsafe_allow_html=True)
 
+
+# ============================================================================
+# MONTH-OVER-MONTH: SNAPSHOT HISTORY & DIFF
+# ============================================================================
+with tab7:
+    st.header("Month-over-Month Cost Changes")
+    st.write("Save monthly snapshots of the fleet and compare them to find new, removed and regressed functions")
+    st.caption("Snapshots always cover the whole fleet; sidebar filters do not apply here.")
+    
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        snapshot_month = st.text_input("Snapshot month (YYYY-MM)", date.today().strftime('%Y-%m'))
+    with col2:
+        st.write("")
+        st.write("")
+        if st.button("💾 Save current data as snapshot"):
+            if re.fullmatch(r'\d{4}-(0[1-9]|1[0-2])', snapshot_month):
+                save_snapshot(fleet_df, snapshot_month)
+                st.success(f"Saved snapshot for {snapshot_month} ({len(fleet_df)} functions)")
+            else:
+                st.error("Snapshot month must look like 2024-06")
+    
+    snapshot_months = list_snapshot_months()
+    if not snapshot_months:
+        st.info("No snapshots saved yet. Save one to start tracking month-over-month changes.")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            baseline_month = st.selectbox("Baseline snapshot", snapshot_months,
+                                          index=max(len(snapshot_months) - 2, 0))
+        with col2:
+            compare_options = ['Current data'] + [m for m in snapshot_months if m != baseline_month]
+            compare_month = st.selectbox("Compare against", compare_options)
+        
+        def _load(month):
+            return load_snapshot(month, snapshot_path(month).stat().st_mtime_ns)
+        
+        before = _load(baseline_month)
+        if compare_month == 'Current data':
+            after = fleet_df[list(SNAPSHOT_DTYPES)].astype(SNAPSHOT_DTYPES)
+        else:
+            after = _load(compare_month)
+        
+        # A snapshot is identified by its modification time, the current data by the fleet fingerprint
+        diff_key = (baseline_month, snapshot_path(baseline_month).stat().st_mtime_ns, compare_month,
+                    snapshot_path(compare_month).stat().st_mtime_ns if compare_month != 'Current data' else fleet_key)
+        diff_job = submit_analysis('snapshot_diff', diff_key, diff_snapshots, before, after)
+        
+        def render_snapshot_diff(snapshot_diff, key):
+            status_counts = snapshot_diff['Status'].value_counts()
+            
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("New Functions", int(status_counts.get('New', 0)))
+            with col2:
+                st.metric("Removed Functions", int(status_counts.get('Removed', 0)))
+            with col3:
+                st.metric("Regressed Functions", int(status_counts.get('Regressed', 0)))
+            with col4:
+                net_change = snapshot_diff['CostUSD_delta'].sum()
+                baseline_cost = snapshot_diff['CostUSD_before'].sum()
+                st.metric("Net Cost Change", f"${net_change:+.2f}", delta_color="inverse",
+                          delta=f"{net_change / baseline_cost * 100:+.1f}%" if baseline_cost else None)
+            st.caption(f"Compared {snapshot_diff['CostUSD_before'].notna().sum()} vs "
+                       f"{snapshot_diff['CostUSD_after'].notna().sum()} functions")
+            
+            # Chart: biggest movers
+            st.subheader("Largest Cost Changes")
+            movers = snapshot_diff.reindex(snapshot_diff['CostUSD_delta'].abs().sort_values(ascending=False).index).head(20)
+            fig1 = px.bar(movers, x='FunctionName', y='CostUSD_delta', color='Status',
+                          title='Top 20 Functions by Absolute Cost Change',
+                          labels={'CostUSD_delta': 'Cost Change (USD)', 'FunctionName': 'Function Name'})
+            fig1.update_xaxes(tickangle=-45)
+            st.plotly_chart(fig1, use_container_width=True, key=f'{key}-movers')
+            
+            # Tables
+            st.subheader("Regressed Functions")
+            regressed_display = snapshot_diff[snapshot_diff['Status'] == 'Regressed'].sort_values('CostUSD_delta', ascending=False)
+            regressed_display = regressed_display[['FunctionName', 'Environment', 'CostUSD_before', 'CostUSD_after',
+                                                   'CostUSD_delta', 'CostDeltaPct', 'InvocationsPerMonth_delta',
+                                                   'MemoryMB_delta', 'ProvisionedConcurrency_delta']].copy()
+            for col in ['CostUSD_before', 'CostUSD_after', 'CostUSD_delta']:
+                regressed_display[col] = regressed_display[col].apply(lambda x: f"${x:.2f}")
+            regressed_display['CostDeltaPct'] = regressed_display['CostDeltaPct'].apply(lambda x: f"{x:+.1f}%")
+            st.dataframe(regressed_display, use_container_width=True, hide_index=True, key=f'{key}-regressed')
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.subheader("New Functions")
+                new_display = snapshot_diff[snapshot_diff['Status'] == 'New'][['FunctionName', 'Environment', 'CostUSD_after']].copy()
+                new_display['CostUSD_after'] = new_display['CostUSD_after'].apply(lambda x: f"${x:.2f}")
+                st.dataframe(new_display, use_container_width=True, hide_index=True, key=f'{key}-new')
+            with col2:
+                st.subheader("Removed Functions")
+                removed_display = snapshot_diff[snapshot_diff['Status'] == 'Removed'][['FunctionName', 'Environment', 'CostUSD_before']].copy()
+                removed_display['CostUSD_before'] = removed_display['CostUSD_before'].apply(lambda x: f"${x:.2f}")
+                st.dataframe(removed_display, use_container_width=True, hide_index=True, key=f'{key}-removed')
+            
+            st.subheader("Recommendations Acted On")
+            acted_on = snapshot_diff[snapshot_diff['MemoryReduced'] | snapshot_diff['PCReduced']]
+            if len(acted_on) > 0:
+                acted_display = acted_on[['FunctionName', 'Environment', 'MemoryMB_before', 'MemoryMB_after',
+                                          'ProvisionedConcurrency_before', 'ProvisionedConcurrency_after',
+                                          'CostUSD_delta']].copy()
+                acted_display['CostUSD_delta'] = acted_display['CostUSD_delta'].apply(lambda x: f"${x:+.2f}")
+                st.dataframe(acted_display, use_container_width=True, hide_index=True, key=f'{key}-acted')
+                st.markdown(f"""
+                <div class="success-box">
+                <strong>Right-sizing changes applied:</strong> {int(acted_on['MemoryReduced'].sum())} memory reductions,
+                {int(acted_on['PCReduced'].sum())} PC reductions
+                </div>
+                """, unsafe_allow_html=True)
+            else:
+                st.info("No memory or provisioned concurrency reductions between these snapshots")
+            
+        render_analysis('snapshot_diff', diff_job, render_snapshot_diff)
+
+# ============================================================================
+# ANOMALIES: OUTLIERS WITHIN ENVIRONMENT PEER GROUPS
+# ============================================================================
+with tab8:
+    st.header("Cost & Efficiency Anomalies")
+    st.write("Rank functions by how far their unit costs and cold-start rate sit above their environment's peers (robust z-scores)")
+    
+    anomaly_threshold = st.slider("Anomaly threshold (modified z-score)", 2.0, 6.0, ANOMALY_Z_THRESHOLD, 0.5)
+    anomaly_columns = ['FunctionName', 'Environment', 'CostUSD', 'InvocationsPerMonth',
+                       'GBSeconds', 'ColdStartRate', 'DataTransferGB']
+    # Score a private copy of the inputs: the tabs above keep adding columns to df
+    anomaly_job = submit_analysis('anomalies', selection_key, score_anomalies, df[anomaly_columns].copy())
+    
+    def render_anomalies(anomaly_scores, key):
+        anomalies = anomaly_scores[anomaly_scores['AnomalyScore'] >= anomaly_threshold]
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Anomalous Functions", len(anomalies), f"out of {len(anomaly_scores)}")
+        with col2:
+            st.metric("Anomalous Functions Cost", f"${anomalies['CostUSD'].sum():.2f}")
+        with col3:
+            top_driver = anomalies['Driver'].mode().iloc[0] if len(anomalies) > 0 else "—"
+            st.metric("Most Common Driver", top_driver)
+        
+        # Chart 1: Top anomaly scores
+        st.subheader("Top 20 Anomaly Scores")
+        top_anomalies = anomaly_scores.head(20)
+        fig1 = px.bar(top_anomalies, x='FunctionName', y='AnomalyScore', color='Driver',
+                      hover_data=['Environment', 'CostUSD'],
+                      title='Highest Anomaly Scores by Function',
+                      labels={'AnomalyScore': 'Anomaly Score (max z)', 'FunctionName': 'Function Name'})
+        fig1.add_hline(y=anomaly_threshold, line_dash="dash", line_color="red", annotation_text="threshold")
+        fig1.update_xaxes(tickangle=-45)
+        st.plotly_chart(fig1, use_container_width=True, key=f'{key}-scores')
+        
+        # Chart 2: z-score heatmap per metric
+        st.subheader("Z-Scores by Metric")
+        z_matrix = top_anomalies.set_index('FunctionName')[[f'{m}_z' for m in ANOMALY_METRICS]]
+        z_matrix.columns = list(ANOMALY_METRICS.values())
+        fig2 = px.imshow(z_matrix.T, color_continuous_scale='RdBu_r', color_continuous_midpoint=0,
+                         aspect='auto', title='Robust Z-Scores vs Environment Peers (top 20)')
+        st.plotly_chart(fig2, use_container_width=True, key=f'{key}-heatmap')
+        
+        # Ranked table
+        st.subheader("Ranked Anomalies")
+        if len(anomalies) > 0:
+            anomaly_display = anomalies[['FunctionName', 'Environment', 'AnomalyScore', 'Driver', 'CostUSD',
+                                         'CostPerInvocation', 'CostPerGBSecond', 'ColdStartRate',
+                                         'TransferPerInvocation']].copy()
+            anomaly_display['AnomalyScore'] = anomaly_display['AnomalyScore'].apply(lambda x: f"{x:.1f}")
+            anomaly_display['CostUSD'] = anomaly_display['CostUSD'].apply(lambda x: f"${x:.2f}")
+            anomaly_display['CostPerInvocation'] = anomaly_display['CostPerInvocation'].apply(lambda x: f"${x * 1000:.4f}/1K")
+            anomaly_display['CostPerGBSecond'] = anomaly_display['CostPerGBSecond'].apply(lambda x: f"${x:.2f}")
+            anomaly_display['ColdStartRate'] = anomaly_display['ColdStartRate'].apply(lambda x: f"{x*100:.2f}%")
+            anomaly_display['TransferPerInvocation'] = anomaly_display['TransferPerInvocation'].apply(lambda x: f"{x * 1e6:.1f} KB")
+            st.dataframe(anomaly_display, use_container_width=True, hide_index=True, key=f'{key}-ranked')
+        else:
+            st.info("No functions exceed the anomaly threshold")
+    
+    render_analysis('anomalies', anomaly_job, render_anomalies)
+
+
+# ============================================================================
+# EXPORT RECOMMENDATIONS
+# ============================================================================
+st.markdown("---")
+
+with st.expander("📦 EXPORT RECOMMENDATIONS FOR AUTOMATION"):
+    st.write("Write every recommendation set for the current filter selection to a typed, compressed file")
+    
+    # Recommendation set -> (source frame getter, chunk builder). The forecast is
+    # priced account-wide by the Exercise 5 job, so exporting it waits for that job.
+    export_sources = {
+        'memory-rightsizing': (lambda: df, lambda chunk: memory_rightsizing_recommendations(chunk, rec_stats)),
+        'pc-actions': (lambda: df, pc_recommendations),
+        'cleanup-candidates': (lambda: df, lambda chunk: cleanup_recommendations(chunk, rec_stats)),
+        'containerization': (lambda: df, lambda chunk: containerization_recommendations(chunk, rec_stats)),
+        'forecast': (lambda: selected_rows(forecast_job['future'].result(), selection), lambda chunk: chunk),
+    }
+    
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        export_sets = st.multiselect("Recommendation sets", list(export_sources), default=list(export_sources))
+    with col2:
+        export_format = st.radio("Format", list(EXPORT_FORMATS), horizontal=True)
+    
+    if st.button("📤 Export", disabled=not export_sets):
+        EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+        # Unique per export, since sessions share the exports directory
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        exported = []
+        for name in export_sets:
+            path = EXPORT_DIR / f"{name}-{stamp}{EXPORT_FORMATS[export_format]}"
+            source, build_fn = export_sources[name]
+            rows = write_export(iter_chunks(source(), build_fn), path, export_format)
+            exported.append((name, path, rows))
+        st.session_state['exports'] = exported
+    
+    for name, path, rows in st.session_state.get('exports', []):
+        if not path.exists():
+            continue
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.caption(f"**{name}**: {rows} rows → `{path}`")
+        with col2:
+            # Deferred: the file is only read when the button is clicked, not on every rerun
+            st.download_button("Download", lambda path=path: path.read_bytes(), file_name=path.name,
+                               key=f"download-{path.name}")
+
+
 # ============================================================================
 # SUMMARY & RECOMMENDATIONS
 # ============================================================================
@@ -835,3 +2018,10 @@ st.markdown("""
 <p>RetailNova Serverless Computing Cost Analysis Dashboard | INFO49971 Cloud Economics | Sheridan College</p>
 </div>
 """, unsafe_allow_html=True)
+
+
+# ============================================================================
+# SERVER STARTUP (python app.py --serve)
+# ============================================================================
+if SERVE:
+    sys.exit(serve(warm_start))